@@ -0,0 +1,20 @@
+# backend/_env.py
+"""Load the .env file once per process.
+
+Modules that read configuration through os.getenv import this module
+instead of calling load_dotenv() themselves.
+"""
+from dotenv import load_dotenv
+
+_loaded = False
+
+
+def load_env() -> None:
+    """Load .env into os.environ if it has not been loaded yet"""
+    global _loaded
+    if not _loaded:
+        load_dotenv()
+        _loaded = True
+
+
+load_env()
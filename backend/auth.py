@@ -1,24 +1,26 @@
 import logging
 import os
+import threading
+import time
 from datetime import datetime, timedelta, UTC
 from typing import Optional
 
 import jwt
+from cachetools import TTLCache
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
-from dotenv import load_dotenv
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jwt import PyJWTError
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 
+import _env  # noqa: F401  (loads .env once per process)
 from db.session import get_db
-from models import User
+from models import User, UserRole
 from schemas import TokenData
 
-# Load environment variables
-load_dotenv()
-
 # Get JWT settings from environment variables
 PRIVATE_KEY_PATH = os.getenv("JWT_PRIVATE_KEY_PATH")
 PUBLIC_KEY_PATH = os.getenv("JWT_PUBLIC_KEY_PATH")
@@ -27,7 +29,7 @@ PUBLIC_KEY_PATH = os.getenv("JWT_PUBLIC_KEY_PATH")
 if not PRIVATE_KEY_PATH or not PUBLIC_KEY_PATH:
     raise ValueError("JWT_PRIVATE_KEY_PATH and JWT_PUBLIC_KEY_PATH must be set in the .env file")
 
-# Load the RSA keys
+# Load the signing keys (Ed25519 or RSA)
 with open(PRIVATE_KEY_PATH, "rb") as key_file:
     PRIVATE_KEY = serialization.load_pem_private_key(
         key_file.read(),
@@ -41,9 +43,27 @@ with open(PUBLIC_KEY_PATH, "rb") as key_file:
         backend=default_backend()
     )
 
+# Ed25519 keys sign with EdDSA, which is much cheaper than RS256 for both
+# signing and verification; RSA keys keep working with RS256
+JWT_ALGORITHM = "EdDSA" if isinstance(PRIVATE_KEY, Ed25519PrivateKey) else "RS256"
+
+# Lifetime of issued access tokens
+TOKEN_LIFETIME = timedelta(days=1)
+
+# Claims every access token must carry; PyJWT rejects tokens missing them
+JWT_DECODE_OPTIONS = {"require": ["exp", "sub"]}
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 logging.info(f"In auth.py oauth2_scheme: {oauth2_scheme}")
 
+# Recently verified tokens: token -> (username, exp timestamp, user id).
+# A hit skips signature verification and loads the user by primary key.
+_TOKEN_CACHE = TTLCache(maxsize=10000, ttl=60)
+_TOKEN_CACHE_LOCK = threading.Lock()
+
+# Built once so every lookup reuses the same cached compiled statement
+_USER_BY_NAME = select(User).where(User.user_name == bindparam("user_name"))
+
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     # logging.info(f"token in auth.py get_current_user: {token}")
@@ -52,8 +72,18 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"}
     )
+
+    with _TOKEN_CACHE_LOCK:
+        cached = _TOKEN_CACHE.get(token)
+    if cached is not None:
+        cached_username, expires_at, user_id = cached
+        if expires_at > time.time():
+            user = db.get(User, user_id)
+            if user is not None and user.user_name == cached_username:
+                return user
+
     try:
-        payload = jwt.decode(token, PUBLIC_KEY, algorithms=["RS256"])
+        payload = jwt.decode(token, PUBLIC_KEY, algorithms=[JWT_ALGORITHM], options=JWT_DECODE_OPTIONS)
         username: Optional[str] = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -61,15 +91,17 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except PyJWTError as e:
         print("JWT decoding error:", e)  # Debugging output
         raise credentials_exception
-    user = db.query(User).filter(User.user_name == token_data.username).first()
+    user = db.execute(_USER_BY_NAME, {"user_name": token_data.username}).scalar_one_or_none()
     if user is None:
         raise credentials_exception
+
+    with _TOKEN_CACHE_LOCK:
+        _TOKEN_CACHE[token] = (user.user_name, payload["exp"], user.id)
     return user
 
 
 def check_admin(user: User):
-    user_roles = user.roles.split(',') if isinstance(user.roles, str) else user.roles
-    if 'ADMIN' not in user_roles:
+    if not user.has_role(UserRole.ADMIN):
         raise HTTPException(status_code=403, detail="Only admins can perform this action")
 
 
@@ -86,14 +118,14 @@ def create_token(data: dict):
     # Convert all roles to uppercase
     roles = [r.upper() for r in roles]
 
-    # Add expiration using timezone-aware datetime
-    expire = datetime.now(UTC) + timedelta(days=1)
+    # Add expiration and issued-at from a single timezone-aware timestamp
+    now = datetime.now(UTC)
     to_encode.update({
-        "exp": expire,
+        "exp": now + TOKEN_LIFETIME,
         "roles": roles,
         "sub": data.get("sub", ""),
-        "iat": datetime.now(UTC)  # Added issued at time
+        "iat": now
     })
 
-    encoded_jwt = jwt.encode(to_encode, PRIVATE_KEY, algorithm="RS256")
+    encoded_jwt = jwt.encode(to_encode, PRIVATE_KEY, algorithm=JWT_ALGORITHM)
     return encoded_jwt
\ No newline at end of file
@@ -1,6 +1,6 @@
 # config.py
-from functools import lru_cache
-from typing import List, Literal
+from functools import cached_property, lru_cache
+from typing import List, Literal, Optional
 import os
 
 import pydantic_settings
@@ -21,6 +21,10 @@ class Settings(pydantic_settings.BaseSettings):
     # Server Settings
     HOST: str = Field(default="0.0.0.0", description="Server host")
     PORT: int = Field(default=8000, ge=1, le=65535, description="Server port")
+    WORKERS: int = Field(default=1, ge=1, description="Uvicorn worker processes (ignored in debug/reload mode)")
+    THREADPOOL_TOKENS: Optional[int] = Field(
+        default=None, ge=1, description="Threads for sync endpoints/dependencies (default: max(100, 2 * DB_POOL_SIZE))"
+    )
 
     # Logging
     LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO"
@@ -33,6 +37,10 @@ class Settings(pydantic_settings.BaseSettings):
     MYSQL_USER: str
     MYSQL_PASSWORD: str
     MYSQL_DATABASE: str
+    DB_POOL_SIZE: int = Field(default=20, ge=1, description="Persistent connections kept in the pool")
+    DB_MAX_OVERFLOW: int = Field(default=10, ge=0, description="Extra connections allowed under burst load")
+    DB_POOL_RECYCLE: int = Field(default=1800, ge=-1, description="Seconds before a pooled connection is replaced")
+    DB_CONNECT_TIMEOUT: int = Field(default=5, ge=1, description="Seconds to wait when opening a connection")
 
     # Email Settings
     EMAIL_HOST: str
@@ -44,6 +52,7 @@ class Settings(pydantic_settings.BaseSettings):
     # Security Settings
     JWT_PRIVATE_KEY_PATH: str
     JWT_PUBLIC_KEY_PATH: str
+    BCRYPT_ROUNDS: int = Field(default=12, ge=4, le=31, description="bcrypt cost factor; use 4 only for dev/CI")
     CORS_ORIGINS: str = "*"
     CORS_CREDENTIALS: bool = True
     CORS_METHODS: str = "*"
@@ -83,26 +92,26 @@ class Settings(pydantic_settings.BaseSettings):
             raise ValueError(f"File {value} does not exist")
         return value
 
-    # Properties
-    @property
+    # Properties (computed once per Settings instance)
+    @cached_property
     def cors_origins_list(self) -> List[str]:
         if self.CORS_ORIGINS == "*":
             return ["*"]
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
 
-    @property
+    @cached_property
     def cors_methods_list(self) -> List[str]:
         if self.CORS_METHODS == "*":
             return ["*"]
         return [method.strip() for method in self.CORS_METHODS.split(",")]
 
-    @property
+    @cached_property
     def cors_headers_list(self) -> List[str]:
         if self.CORS_HEADERS == "*":
             return ["*"]
         return [header.strip() for header in self.CORS_HEADERS.split(",")]
 
-    @property
+    @cached_property
     def database_url(self) -> str:
         """Property method using implicit self"""
         return (
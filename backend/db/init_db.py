@@ -1,16 +1,18 @@
 # db/init_db.py
 import os
+import asyncio
 import logging
-from datetime import datetime, UTC
-import bcrypt
-import pymysql
-from sqlalchemy import inspect, Column, String, DateTime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy import inspect, select
 
 from db.base import Base
 from db.session import (
     engine,
     SessionLocal,
-    SQLALCHEMY_DATABASE_URL
+    SQLALCHEMY_DATABASE_URL,
+    mysql_dbapi
 )
 
 logger = logging.getLogger(__name__)
@@ -25,23 +27,8 @@ MYSQL_DATABASE = os.getenv("MYSQL_DATABASE")
 # Get initial user credentials from environment
 INITIAL_USER = os.getenv("INITIAL_USER")
 INITIAL_PASSWORD = os.getenv("INITIAL_PASSWORD")
-
-# Define a table to track database initialization
-class DBInit(Base):
-    __tablename__ = 'db_init'
-
-    id = Column(String(36), primary_key=True)
-    initialized_at = Column(DateTime(timezone=True), nullable=False)
-
-def is_database_initialized(session):
-    """Check if database has been initialized before"""
-    return session.query(DBInit).first() is not None
-
-def mark_database_initialized(session):
-    """Mark database as initialized"""
-    db_init = DBInit(id='1', initialized_at=datetime.now(UTC))
-    session.add(db_init)
-    session.commit()
+# Optional precomputed bcrypt hash of INITIAL_PASSWORD (skips hashing on first boot)
+INITIAL_PASSWORD_HASH = os.getenv("INITIAL_PASSWORD_HASH")
 
 def check_database_exists():
     """Check if the database exists and create it if it doesn't"""
@@ -50,7 +37,7 @@ def check_database_exists():
         # Parse database name from URL
         db_name = SQLALCHEMY_DATABASE_URL.split('/')[-1]
 
-        connection = pymysql.connect(
+        connection = mysql_dbapi.connect(
             host=MYSQL_HOST,
             port=int(MYSQL_PORT),
             user=MYSQL_USER,
@@ -58,27 +45,35 @@ def check_database_exists():
         )
         try:
             with connection.cursor() as cursor:
-                cursor.execute("SHOW DATABASES")
-                databases = [db[0] for db in cursor.fetchall()]
-
-                if db_name in databases:
-                    logger.info(f"Database '{db_name}' already exists.")
-                    return False
+                # MySQL reports one affected row when the database is created
+                # and none (plus a warning) when it already exists
+                quoted_name = db_name.replace("`", "``")
+                created = cursor.execute(
+                    f"CREATE DATABASE IF NOT EXISTS `{quoted_name}` "
+                    "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"
+                ) == 1
+
+                if created:
+                    logger.info("Database '%s' created successfully!", db_name)
                 else:
-                    cursor.execute(f"CREATE DATABASE {db_name}")
-                    logger.info(f"Database '{db_name}' created successfully!")
-                    return True
+                    logger.info("Database '%s' already exists.", db_name)
+                return created
         finally:
             connection.close()
     except Exception as e:
-        logger.error(f"Error checking/creating database: {str(e)}")
+        logger.error("Error checking/creating database: %s", e)
         raise
 
 
+@lru_cache(maxsize=1)
+def _existing_table_names() -> frozenset:
+    """Reflect the database's table names once; cleared after tables are created"""
+    return frozenset(inspect(engine).get_table_names())
+
+
 def table_exists(table_name: str) -> bool:
     """Check if a table exists in the database"""
-    inspector = inspect(engine)
-    return table_name in inspector.get_table_names()
+    return table_name in _existing_table_names()
 
 
 def get_all_model_tables():
@@ -91,21 +86,30 @@ def get_all_model_tables():
     return Base.metadata.tables
 
 
-def create_initial_admin_user(session):
+def _hash_initial_password() -> str:
+    """bcrypt-hash INITIAL_PASSWORD; bcrypt releases the GIL, so this can run in a worker thread"""
+    from services.password_service import hash_password
+
+    return hash_password(INITIAL_PASSWORD)
+
+
+def create_initial_admin_user(session, hashed_password: Optional[str] = None):
     """Create initial admin user if it doesn't exist"""
     from models.user import User, UserStatus, UserRole
     from models.user_profile import UserProfile, UserAddress
 
     try:
         # Check if admin user already exists
-        existing_admin = session.query(User).filter(User.user_name == INITIAL_USER).first()
-        if existing_admin:
+        admin_exists = session.scalar(
+            select(User.id).where(User.user_name == INITIAL_USER).limit(1)
+        ) is not None
+        if admin_exists:
             logger.info("Admin user already exists.")
             return
 
-        # Hash the password
-        password_bytes = INITIAL_PASSWORD.encode('utf-8')
-        hashed_password = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
+        # Hash the password unless a hash was passed in or precomputed
+        if hashed_password is None:
+            hashed_password = INITIAL_PASSWORD_HASH or _hash_initial_password()
 
         # Create admin user
         admin_user = User(
@@ -113,19 +117,14 @@ def create_initial_admin_user(session):
             last_name="User",
             user_name=INITIAL_USER,
             email="admin@example.com",
-            hashed_password=hashed_password.decode('utf-8'),
+            hashed_password=hashed_password,
             status=UserStatus.ACTIVE,
-            roles=UserRole.ADMIN.value,
-            created_at=datetime.now(UTC),
-            updated_at=datetime.now(UTC)
+            roles=UserRole.ADMIN.value
         )
 
-        session.add(admin_user)
-        session.flush()
-
-        # Create associated profile and address
-        admin_profile = UserProfile(
-            user_id=admin_user.id,
+        # Attach profile and address through the relationships so a single
+        # flush inserts the user and then both dependent rows
+        admin_user.profile = UserProfile(
             date_of_birth="",
             gender="prefer_not_to_say",
             phone="",
@@ -137,41 +136,35 @@ def create_initial_admin_user(session):
             privacy_settings={"profile_visibility": "private", "show_email": False, "show_phone": False}
         )
 
-        admin_address = UserAddress(
-            user_id=admin_user.id,
+        admin_user.addresses = [UserAddress(
             street = "",
             city = "",
             state = "",
             country = "",
             postal_code = ""
-        )
+        )]
 
-        session.add_all([admin_profile, admin_address])
+        session.add(admin_user)
         session.commit()
 
         logger.info("Initial admin user created successfully.")
-        logger.info(f"Default login: {INITIAL_USER}")
-        logger.info(f"Default password: {INITIAL_PASSWORD}")
+        logger.info("Default login: %s", INITIAL_USER)
+        logger.info("Default password: %s", INITIAL_PASSWORD)
 
     except Exception as e:
         session.rollback()
-        logger.error(f"Error creating admin user: {str(e)}")
+        logger.error("Error creating admin user: %s", e)
         raise
 
 
 def check_tables_exist():
     """Check which tables exist and which need to be created"""
-    model_tables = get_all_model_tables()
-    missing_tables = []
-    existing_tables = []
-
-    logger.info("Checking tables in metadata:")
-    for table_name in model_tables.keys():
-        logger.info(f"Found table in metadata: {table_name}")
-        if table_exists(table_name):
-            existing_tables.append(table_name)
-        else:
-            missing_tables.append(table_name)
+    model_tables = get_all_model_tables().keys()
+    database_tables = _existing_table_names()
+
+    logger.info("Checking tables in metadata: %s", ", ".join(model_tables))
+    existing_tables = sorted(model_tables & database_tables)
+    missing_tables = sorted(model_tables - database_tables)
 
     return existing_tables, missing_tables
 
@@ -184,6 +177,13 @@ def init_db():
         # Check if this is a new database
         is_new_database = check_database_exists()
 
+        # Start hashing the admin password now so it overlaps the DDL below
+        password_future = None
+        if is_new_database and not INITIAL_PASSWORD_HASH:
+            executor = ThreadPoolExecutor(max_workers=1)
+            password_future = executor.submit(_hash_initial_password)
+            executor.shutdown(wait=False)
+
         # Check existing tables
         existing_tables, missing_tables = check_tables_exist()
 
@@ -197,26 +197,32 @@ def init_db():
                 bind=engine,
                 tables=[Base.metadata.tables[table] for table in missing_tables]
             )
+            _existing_table_names.cache_clear()
             logger.info("Missing tables created successfully.")
         else:
             logger.info("All required tables already exist.")
 
-        # Create initial admin user if needed
+        # Create initial admin user if needed; its own existence check makes this idempotent
         if is_new_database:
             db = SessionLocal()
             try:
-                if not is_database_initialized(db):
-                    create_initial_admin_user(db)
-                    mark_database_initialized(db)
-                    logger.info("Database initialization completed successfully.")
+                create_initial_admin_user(
+                    db, password_future.result() if password_future else None
+                )
+                logger.info("Database initialization completed successfully.")
             finally:
                 db.close()
-
-        logger.info("Database already initialized, skipping admin user creation.")
+        else:
+            logger.info("Database already initialized, skipping admin user creation.")
 
     except Exception as e:
-        logger.error("Error during database initialization: %s", str(e))
+        logger.error("Error during database initialization: %s", e)
         raise
 
 
-__all__ = ['init_db']
\ No newline at end of file
+async def init_db_async():
+    """Run init_db in a worker thread so startup DDL doesn't block the event loop"""
+    await asyncio.to_thread(init_db)
+
+
+__all__ = ['init_db', 'init_db_async']
\ No newline at end of file
@@ -1,10 +1,13 @@
 # db/session.py
 import os
 import logging
-from dotenv import load_dotenv
+import orjson
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+import _env  # noqa: F401  (loads .env once per process)
+from config import get_settings
+
 # Configure SQLAlchemy logging
 for logger_name in [
     'sqlalchemy.engine',
@@ -20,9 +23,6 @@ for logger_name in [
     logging.getLogger(logger_name).propagate = False
     logging.getLogger(logger_name).handlers = []
 
-# Load environment variables
-load_dotenv()
-
 # Database configuration
 MYSQL_HOST = os.getenv("MYSQL_HOST")
 MYSQL_PORT = os.getenv("MYSQL_PORT")
@@ -30,21 +30,46 @@ MYSQL_USER = os.getenv("MYSQL_USER")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
 MYSQL_DATABASE = os.getenv("MYSQL_DATABASE")
 
+# Prefer the mysqlclient C driver; fall back to pure-Python PyMySQL when it isn't installed
+try:
+    import MySQLdb as mysql_dbapi
+    MYSQL_DRIVER = "mysqldb"
+except ImportError:
+    import pymysql as mysql_dbapi
+    MYSQL_DRIVER = "pymysql"
+
 # URLs
-BASE_URL = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}"
+BASE_URL = f"mysql+{MYSQL_DRIVER}://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}"
 SQLALCHEMY_DATABASE_URL = f"{BASE_URL}/{MYSQL_DATABASE}"
 
+
+def _json_serializer(value) -> str:
+    """orjson for JSON columns; NON_STR_KEYS keeps json.dumps' handling of int dict keys"""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 # Create engine and session factory
+# pre_ping discards connections MySQL has closed after wait_timeout, recycle
+# retires them before that happens, and LIFO keeps the hottest ones in use
+settings = get_settings()
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    echo=False
+    echo=False,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_use_lifo=True,
+    connect_args={"connect_timeout": settings.DB_CONNECT_TIMEOUT},
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-async def get_db():
-    """Dependency for getting DB session"""
+def get_db():
+    """Dependency for getting DB session (sync, so FastAPI runs its close() in the threadpool)"""
     db = SessionLocal()
     try:
         yield db
@@ -58,6 +83,7 @@ __all__ = [
     'SessionLocal',
     'get_db',
     'SQLALCHEMY_DATABASE_URL',
+    'mysql_dbapi',
     'MYSQL_HOST',
     'MYSQL_PORT',
     'MYSQL_USER',
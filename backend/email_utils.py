@@ -1,14 +1,99 @@
 import base64
+import copy
 import logging
 import os
 import smtplib
+import threading
 import urllib.parse
+from dataclasses import dataclass
 from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from functools import lru_cache
 from typing import Optional
 
 
+@dataclass(frozen=True, slots=True)
+class _SmtpConfig:
+    host: Optional[str]
+    port: int
+    username: Optional[str]
+    password: Optional[str]
+
+
+@lru_cache(maxsize=1)
+def _smtp_config() -> _SmtpConfig:
+    """Read the EMAIL_* environment once; call cache_clear() if it changes"""
+    return _SmtpConfig(
+        host=os.getenv("EMAIL_HOST"),
+        port=int(os.getenv("EMAIL_PORT", "587")),
+        username=os.getenv("EMAIL_USERNAME"),
+        password=os.getenv("EMAIL_PASSWORD")
+    )
+
+
+class _SmtpConnection:
+    """One authenticated SMTP session per process, shared by background send tasks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client: Optional[smtplib.SMTP] = None
+
+    def _connect(self, config: _SmtpConfig) -> smtplib.SMTP:
+        self._disconnect()
+        client = smtplib.SMTP(config.host, config.port, timeout=30)
+        try:
+            client.starttls()
+            client.login(config.username, config.password)
+        except Exception:
+            client.close()
+            raise
+        self._client = client
+        return client
+
+    def _disconnect(self) -> None:
+        if self._client is not None:
+            try:
+                self._client.quit()
+            except (smtplib.SMTPException, OSError):
+                self._client.close()
+            self._client = None
+
+    def send(self, config: _SmtpConfig, to_email: str, payload: str) -> None:
+        """Send over the open session, reconnecting once if the server dropped it"""
+        with self._lock:
+            client = self._client or self._connect(config)
+            try:
+                client.sendmail(config.username, to_email, payload)
+            except smtplib.SMTPServerDisconnected:
+                self._connect(config).sendmail(config.username, to_email, payload)
+            except Exception:
+                self._disconnect()
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+
+_smtp = _SmtpConnection()
+
+
+def close_smtp_connection() -> None:
+    """Close the shared SMTP session (called on application shutdown)"""
+    _smtp.close()
+
+
+@lru_cache(maxsize=8)
+def _load_inline_image(image_path: str) -> MIMEImage:
+    """Read and base64-encode an inline image once; callers attach a copy"""
+    with open(image_path, 'rb') as img:
+        mime_image = MIMEImage(img.read())
+    mime_image.add_header('Content-ID', '<security_graphic>')
+    mime_image.add_header('Content-Disposition', 'inline', filename='Security_Graphic.png')
+    return mime_image
+
+
 def create_mime_message(
         to_email: str,
         subject: str,
@@ -16,47 +101,41 @@ def create_mime_message(
         html_content: str,
         image_path: Optional[str] = None
 ) -> MIMEMultipart:
-    sender_email = os.getenv("EMAIL_USERNAME")
+    sender_email = _smtp_config().username
 
-    # Create the root MIME message
-    message = MIMEMultipart('related')
-    message["Subject"] = subject
-    message["From"] = sender_email
-    message["To"] = to_email
+    # Load the image first so the message is only wrapped in 'related' when it has one
+    mime_image = None
+    if image_path:
+        try:
+            # Shallow copy shares the already-encoded payload with the cached part
+            mime_image = copy.copy(_load_inline_image(image_path))
+        except Exception as e:
+            logging.warning(f"Failed to attach image {image_path}: {str(e)}")
 
-    # Create the multipart/alternative child
+    # Create the multipart/alternative part with text and HTML versions
     msg_alternative = MIMEMultipart('alternative')
-    message.attach(msg_alternative)
-
-    # Attach text and HTML versions
     msg_alternative.attach(MIMEText(text_content, "plain"))
     msg_alternative.attach(MIMEText(html_content, "html"))
 
-    # Attach image if provided
-    if image_path:
-        try:
-            with open(image_path, 'rb') as img:
-                mime_image = MIMEImage(img.read())
-                mime_image.add_header('Content-ID', '<security_graphic>')
-                mime_image.add_header('Content-Disposition', 'inline', filename='Security_Graphic.png')
-                message.attach(mime_image)
-        except Exception as e:
-            logging.warning(f"Failed to attach image {image_path}: {str(e)}")
+    # Create the root MIME message
+    if mime_image is not None:
+        message = MIMEMultipart('related')
+        message.attach(msg_alternative)
+        message.attach(mime_image)
+    else:
+        message = msg_alternative
+    message["Subject"] = subject
+    message["From"] = sender_email
+    message["To"] = to_email
 
     return message
 
 
 def send_email(to_email: str, message: MIMEMultipart):
-    sender_email = os.getenv("EMAIL_USERNAME")
-    sender_password = os.getenv("EMAIL_PASSWORD")
-    email_host = os.getenv("EMAIL_HOST")
-    email_port = int(os.getenv("EMAIL_PORT", "587"))
+    config = _smtp_config()
 
     try:
-        with smtplib.SMTP(email_host, email_port) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, to_email, message.as_string())
+        _smtp.send(config, to_email, message.as_string())
         logging.info(f"Email sent successfully to {to_email}")
     except Exception as e:
         logging.error(f"Failed to send email to {to_email}: {str(e)}")
@@ -1,24 +1,22 @@
 # backend/main.py
 import logging
 import asyncio
-from typing import Any
+from anyio import create_task_group, to_thread
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-from sqlalchemy import inspect
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import ORJSONResponse
 
+import _env  # noqa: F401  (loads .env before any settings are read)
 from config import get_settings
-from db.session import get_db
-from db.init_db import init_db
-from middleware.performance import record_performance_metrics
+from db.init_db import init_db_async, table_exists
+from email_utils import close_smtp_connection
+from middleware.performance import PerformanceMetricsMiddleware
 from middleware.enhanced_connection_tracker import connection_tracker
 from middleware.connection_middleware import EnhancedConnectionMiddleware
-from middleware.db_middleware import DatabaseMiddleware
 from middleware.cors import setup_cors
 from models.performance import ServerPerformance
-from workers.performance_worker import PerformanceMonitor
+from workers.performance_worker import PerformanceMonitor, create_metrics_queue, flush_request_metrics
 from routes.auth_routes import router as auth_router
 from routes.user_routes import router as user_router
 from routes.performance_routes import router as performance_router
@@ -29,10 +27,11 @@ ua = "uvicorn.access"
 
 # Get settings instance
 settings = get_settings()
+log_level = logging.getLevelNamesMapping()[settings.LOG_LEVEL]
 
 # Base logging configuration
 logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
+    level=log_level,
     format=settings.LOG_FORMAT,
     force=True
 )
@@ -44,67 +43,60 @@ logging.getLogger(ua).setLevel(logging.INFO)
 
 # Get root logger
 root_logger = logging.getLogger()
-root_logger.setLevel(getattr(logging, settings.LOG_LEVEL))
+root_logger.setLevel(log_level)
 
 # Application logger
 logger = logging.getLogger(__name__)
 
-# Initialize performance monitor
-performance_monitor = PerformanceMonitor(interval=60)
-
-
 @asynccontextmanager
-async def lifespan(_: FastAPI):
+async def lifespan(fastapi_app: FastAPI):
     """
     Application lifespan manager handling startup and shutdown tasks
     """
-    monitoring_task = None
-
     try:
-        # Start connection tracking cleanup task
-        await connection_tracker.start_cleanup_task()
-
-        # Database verification
-        async for db in get_db():  # Updated to use async generator
-            try:
-                inspector = inspect(db.bind)
-
-                if not inspector.has_table(ServerPerformance.__tablename__):
-                    logger.error(f"Table {ServerPerformance.__tablename__} does not exist!")
-                    raise RuntimeError(f"Required table {ServerPerformance.__tablename__} is missing")
+        # Sync endpoints and DB dependencies run on anyio's threadpool (40 threads by default)
+        to_thread.current_default_thread_limiter().total_tokens = (
+            settings.THREADPOOL_TOKENS or max(100, settings.DB_POOL_SIZE * 2)
+        )
 
-                logger.info(f"Verified {ServerPerformance.__tablename__} table exists")
-                break  # Exit after successful verification
-            finally:
-                db.close()
+        # Initialize the database on startup rather than at import time
+        await init_db_async()
 
-        # Start performance monitoring
-        logger.info("Starting performance monitoring...")
-        monitoring_task = asyncio.create_task(performance_monitor.start_monitoring())
-
-        yield
+        # Database verification (reflection is blocking, so keep it off the event loop)
+        if not await asyncio.to_thread(table_exists, ServerPerformance.__tablename__):
+            logger.error(f"Table {ServerPerformance.__tablename__} does not exist!")
+            raise RuntimeError(f"Required table {ServerPerformance.__tablename__} is missing")
 
+        logger.info(f"Verified {ServerPerformance.__tablename__} table exists")
     except Exception as e:
         logger.error(f"Startup error: {str(e)}")
+        close_smtp_connection()
         raise
-    finally:
-        # Shutdown tasks
-        logger.info("Stopping performance monitoring...")
-        performance_monitor.stop_monitoring()
-
-        if monitoring_task:
-            monitoring_task.cancel()
-            try:
-                await monitoring_task
-            except asyncio.CancelledError:
-                pass  # This is expected
-            except Exception as e:
-                logger.error(f"Error during monitoring shutdown: {str(e)}")
+
+    # Created here rather than at import, so importing main doesn't build the monitor and the
+    # metrics queue binds to this lifespan's event loop
+    performance_monitor = PerformanceMonitor(interval=60)
+    fastapi_app.state.performance_monitor = performance_monitor
+    metrics_queue = create_metrics_queue()
+    fastapi_app.state.metrics_queue = metrics_queue
+
+    # Background loops run in a task group, so shutdown cancels and awaits them together
+    async with create_task_group() as task_group:
+        task_group.start_soon(connection_tracker.cleanup_stale_connections)
+        task_group.start_soon(flush_request_metrics, metrics_queue)
+
+        logger.info("Starting performance monitoring...")
+        task_group.start_soon(performance_monitor.start_monitoring)
 
         try:
-            await connection_tracker.stop_cleanup_task()
-        except Exception as e:
-            logger.error(f"Error stopping connection tracker: {str(e)}")
+            yield
+        finally:
+            # Shutdown tasks
+            logger.info("Stopping performance monitoring...")
+            performance_monitor.stop_monitoring()
+            del fastapi_app.state.metrics_queue
+            task_group.cancel_scope.cancel()
+            close_smtp_connection()
 
 
 # Create FastAPI app with lifespan
@@ -112,40 +104,30 @@ app = FastAPI(
     title=settings.PROJECT_NAME,
     description=settings.PROJECT_DESCRIPTION,
     version=settings.API_VERSION,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 
-# Custom error handling middleware
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Any) -> Any:
-        try:
-            response = await call_next(request)
-            return response
-        except Exception as e:
-            logger.error(f"Unhandled error: {str(e)}", exc_info=True)
-            return JSONResponse(
-                status_code=500,
-                content={
-                    "detail": "An internal server error occurred",
-                    "message": str(e) if settings.DEBUG else None
-                }
-            )
+# Catch-all error handler (runs in Starlette's outermost error middleware, no extra layer)
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(_: Request, exc: Exception) -> ORJSONResponse:
+    logger.error(f"Unhandled error: {str(exc)}", exc_info=exc)
+    return ORJSONResponse(
+        status_code=500,
+        content={
+            "detail": "An internal server error occurred",
+            "message": str(exc) if settings.DEBUG else None
+        }
+    )
 
 
 # Configure CORS
 setup_cors(app)
 
 # Add middleware in correct order - order is important!
-# 1. Error handling should be first to catch all errors
-# noinspection PyTypeChecker
-app.add_middleware(ErrorHandlingMiddleware)
-
-# 2. Database middleware to ensure DB session is available
-# noinspection PyTypeChecker
-app.add_middleware(DatabaseMiddleware)
-
-# 3. Enhanced connection tracking with rate limiting
+# (DB sessions come from Depends(get_db) on the routes that need them, not from a middleware)
+# 1. Enhanced connection tracking with rate limiting
 # noinspection PyTypeChecker
 app.add_middleware(
     EnhancedConnectionMiddleware,
@@ -154,11 +136,9 @@ app.add_middleware(
     exclude_paths=["/api/health", "/api/rate-limit-info"]  # Optional: exclude certain paths
 )
 
-# 4. Performance metrics recording
-app.middleware("http")(record_performance_metrics)
-
-# Initialize the database
-init_db()
+# 2. Performance metrics recording
+# noinspection PyTypeChecker
+app.add_middleware(PerformanceMetricsMiddleware)
 
 # Include routers
 app.include_router(
@@ -188,7 +168,7 @@ app.include_router(
 )
 
 
-@app.get("/api/health", tags=["Health"])
+@app.get("/api/health", tags=["Health"], response_class=ORJSONResponse)
 async def health_check():
     """
     Enhanced health check endpoint that includes connection metrics
@@ -209,12 +189,12 @@ async def health_check():
     }
 
 
-@app.get("/api/rate-limit-info", tags=["Rate Limit Info"])
+@app.get("/api/rate-limit-info", tags=["Rate Limit Info"], response_class=ORJSONResponse)
 async def rate_limit_info(request: Request):
     """
     Endpoint to check current rate limit status for the requesting IP
     """
-    client_ip = request.client.host
+    client_ip, _ = request.scope.get("client") or ("unknown", 0)
     metrics = connection_tracker.get_metrics()
 
     return {
@@ -225,6 +205,7 @@ async def rate_limit_info(request: Request):
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
 
     uvicorn.run(
@@ -232,5 +213,8 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
+        workers=1 if settings.DEBUG else settings.WORKERS,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",  # uvloop has no Windows build
+        http="httptools",
         log_level=settings.LOG_LEVEL.lower()
     )
\ No newline at end of file
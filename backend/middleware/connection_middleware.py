@@ -1,126 +1,150 @@
 # backend/middleware/connection_middleware.py
-from fastapi import Request, Response, FastAPI
-from starlette.middleware.base import BaseHTTPMiddleware
+from cachetools import LRUCache
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import itertools
 import logging
 from typing import List, Optional
-from contextlib import asynccontextmanager
 from .enhanced_connection_tracker import connection_tracker
 
 logger = logging.getLogger(__name__)
 
+# Pre-encoded (lowercase) names for the tracking headers appended to every response
+_H_ACTIVE = b"x-active-connections"
+_H_ENDPOINT = b"x-endpoint-connections"
+_H_UNIQUE_IPS = b"x-total-unique-ips"
+_H_LIMIT = b"x-ratelimit-limit"
+_H_WINDOW = b"x-ratelimit-window"
 
-@asynccontextmanager
-async def track_connection(request: Request, rate_limit: int, rate_window: int, exclude_paths: List[str]):
-    """Enhanced connection tracking context manager"""
-    request_id = f"{request.client.host}:{request.client.port}-{id(request)}"
-
-    # Skip rate limiting for excluded paths
-    if request.url.path in exclude_paths:
-        yield True
-        return
-
-    # Get authentication status from request state if available
-    user = getattr(request.state, "user", None)
-    is_authenticated = user is not None
-    user_id = getattr(user, "id", None) if user else None
-
-    try:
-        # Check rate limit before adding connection
-        rate_limit_ok = await connection_tracker.check_rate_limit(
-            source_ip=request.client.host,
-            endpoint=request.url.path,
-            limit=rate_limit,
-            window=rate_window
-        )
+_RATE_LIMITED_BODY = b"Rate limit exceeded"
 
-        if not rate_limit_ok:
-            logger.warning(
-                f"Rate limit exceeded for {request.client.host} on {request.url.path} "
-                f"(limit: {rate_limit} requests per {rate_window} seconds)"
-            )
-            yield False
-            return
+# Rate-limit/tracking key for requests that match no route, so random 404 paths share one bucket per IP
+_UNMATCHED_ROUTE = "<unmatched>"
 
-        await connection_tracker.add_connection(
-            request_id=request_id,
-            endpoint=request.url.path,
-            source_ip=request.client.host,
-            port=request.client.port,
-            is_authenticated=is_authenticated,
-            user_id=user_id  # Removed rate_window parameter
-        )
-        yield True
-    except Exception as e:
-        logger.error(f"Error tracking connection: {str(e)}")
-        yield True  # Allow request to proceed even if tracking fails
-    finally:
-        try:
-            duration = await connection_tracker.remove_connection(request_id)
-            if duration is not None:
-                logger.debug(f"Connection {request_id} duration: {duration:.2f}s")
-        except Exception as e:
-            logger.error(f"Error removing connection: {str(e)}")
+# Resolved (method, path) -> route template entries kept per middleware instance
+ROUTE_TEMPLATE_CACHE_SIZE = 4096
 
+# Process-wide request sequence: unlike id(), numbers are never reused while the process runs
+_next_request_id = itertools.count(1).__next__
+
+
+def _match_route_template(scope: Scope) -> str:
+    """Path template of the route Starlette will pick (e.g. /api/users/{user_id}).
+    Like Router.__call__, the first FULL match wins and a PARTIAL match (e.g. wrong method)
+    is only used when nothing matches fully."""
+    router = getattr(scope.get("app"), "router", None)
+    partial = None
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return getattr(route, "path", _UNMATCHED_ROUTE)
+        if match is Match.PARTIAL and partial is None:
+            partial = route
+    return getattr(partial, "path", _UNMATCHED_ROUTE)
+
+
+class EnhancedConnectionMiddleware:
+    """Pure ASGI connection tracking and rate limiting middleware"""
 
-class EnhancedConnectionMiddleware(BaseHTTPMiddleware):
     def __init__(
             self,
-            app,
+            app: ASGIApp,
             rate_limit: int = 100,
             rate_window: int = 60,
             exclude_paths: Optional[List[str]] = None
     ):
-        super().__init__(app)
+        self.app = app
         self.rate_limit = rate_limit
         self.rate_window = rate_window
-        self.exclude_paths = exclude_paths or []
+        self.exclude_paths = frozenset(exclude_paths or ())
+        self._route_templates = LRUCache(maxsize=ROUTE_TEMPLATE_CACHE_SIZE)
+        self._static_headers = [
+            (_H_LIMIT, b"%d" % rate_limit),
+            (_H_WINDOW, b"%d" % rate_window)
+        ]
+        # Every value in the 429 response is known up front, so it is encoded once here
+        self._rate_limited_headers = [
+            (b"content-length", b"%d" % len(_RATE_LIMITED_BODY)),
+            (b"retry-after", b"%d" % rate_window),
+            *self._static_headers,
+            (b"x-ratelimit-reset", b"%d" % rate_window)
+        ]
         logger.info(
             f"Initialized rate limiting: {rate_limit} requests per {rate_window} seconds. "
-            f"Excluded paths: {self.exclude_paths}"
+            f"Excluded paths: {sorted(self.exclude_paths)}"
         )
 
-    async def dispatch(self, request: Request, call_next):
-        async with track_connection(
-                request,
-                self.rate_limit,
-                self.rate_window,
-                self.exclude_paths
-        ) as allowed:
-            if not allowed:
-                return Response(
-                    content="Rate limit exceeded",
-                    status_code=429,
-                    headers={
-                        "Retry-After": str(self.rate_window),
-                        "X-RateLimit-Limit": str(self.rate_limit),
-                        "X-RateLimit-Window": str(self.rate_window),
-                        "X-RateLimit-Reset": str(self.rate_window)
-                    }
-                )
+    def _route_template(self, scope: Scope) -> str:
+        """Rate-limit/tracking key: the route template, not the client-chosen raw path.
+        Cached per (method, path), so the route table is only scanned on a miss."""
+        key = (scope["method"], scope["path"])
+        template = self._route_templates.get(key)
+        if template is None:
+            template = _match_route_template(scope)
+            self._route_templates[key] = template
+        return template
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Non-HTTP scopes and excluded paths skip rate limiting and tracking entirely
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._route_template(scope)
+        host, port = scope.get("client") or ("unknown", 0)  # "client" is optional in the ASGI spec
+        request_id = _next_request_id()
 
-            try:
-                response = await call_next(request)
+        try:
+            # Rate limit check and connection registration in one call
+            user = scope.get("state", {}).get("user")  # Authentication status, if available
+            admitted = connection_tracker.admit_connection(
+                request_id=request_id,
+                endpoint=endpoint,
+                source_ip=host,
+                port=port,
+                is_authenticated=user is not None,
+                user_id=getattr(user, "id", None),
+                limit=self.rate_limit,
+                window=self.rate_window
+            )
+        except Exception as e:
+            logger.error(f"Error tracking connection: {str(e)}")  # Allow request to proceed
+            admitted = True
+
+        if not admitted:
+            # Outer layers may mutate messages, so each rejection gets fresh dicts and a headers copy
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": self._rate_limited_headers.copy()
+            })
+            await send({"type": "http.response.body", "body": _RATE_LIMITED_BODY})
+            return
 
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
                 # Add connection tracking headers
                 metrics = connection_tracker.get_metrics()
-                response.headers.update({
-                    "X-Active-Connections": str(metrics["total_active_connections"]),
-                    "X-Endpoint-Connections": str(
-                        metrics["per_endpoint_connections"].get(request.url.path, 0)
-                    ),
-                    "X-Total-Unique-IPs": str(metrics["unique_ips"]),
-                    "X-RateLimit-Limit": str(self.rate_limit),
-                    "X-RateLimit-Window": str(self.rate_window)  # Added rate window to headers
-                })
-
-                return response
-            except Exception as e:
-                logger.error(f"Error in connection middleware: {str(e)}")
-                raise
 
+                headers = list(message.get("headers", ()))
+                headers.extend((
+                    (_H_ACTIVE, b"%d" % metrics["total_active_connections"]),
+                    (_H_ENDPOINT, b"%d" % metrics["per_endpoint_connections"].get(endpoint, 0)),
+                    (_H_UNIQUE_IPS, b"%d" % metrics["unique_ips"]),
+                    *self._static_headers
+                ))
+                message["headers"] = headers
+            await send(message)
 
-# For backward compatibility
-async def connection_tracking_middleware(app: FastAPI, request: Request, call_next):
-    """Legacy middleware function for compatibility"""
-    middleware = EnhancedConnectionMiddleware(app=app)
-    return await middleware.dispatch(request, call_next)
+        try:
+            await self.app(scope, receive, send_with_headers)
+        except Exception as e:
+            logger.error(f"Error in connection middleware: {str(e)}")
+            raise
+        finally:
+            try:
+                duration = connection_tracker.remove_connection(request_id)
+                if duration is not None and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Connection %d duration: %.2fs", request_id, duration)
+            except Exception as e:
+                logger.error(f"Error removing connection: {str(e)}")
@@ -5,6 +5,29 @@ from fastapi.middleware.cors import CORSMiddleware
 from config import get_settings
 
 
+# Define security headers
+SECURITY_HEADERS = (
+    "Accept",
+    "Accept-Language",
+    "Content-Type",
+    "Content-Length",
+    "Accept-Encoding",
+    "Authorization",
+    "X-CSRF-Token",
+    "X-Requested-With",
+)
+
+# Define exposed headers
+EXPOSED_HEADERS = (
+    "X-Active-Connections",
+    "X-Endpoint-Connections",
+    "X-Total-Unique-IPs",
+    "X-RateLimit-Limit",
+    "X-RateLimit-Remaining",
+    "X-RateLimit-Reset",
+)
+
+
 def setup_cors(app: FastAPI) -> None:
     """
     Configure CORS middleware with security best practices
@@ -23,31 +46,12 @@ def setup_cors(app: FastAPI) -> None:
         ]
     )
 
-    # Define security headers
-    security_headers = [
-        "Accept",
-        "Accept-Language",
-        "Content-Type",
-        "Content-Length",
-        "Accept-Encoding",
-        "Authorization",
-        "X-CSRF-Token",
-        "X-Requested-With",
-    ]
-
-    # Define exposed headers
-    exposed_headers = [
-        "X-Active-Connections",
-        "X-Endpoint-Connections",
-        "X-Total-Unique-IPs",
-        "X-RateLimit-Limit",
-        "X-RateLimit-Remaining",
-        "X-RateLimit-Reset",
-    ]
-
-    # Add custom headers from settings if they exist
-    if settings.cors_headers_list != ["*"]:
-        security_headers.extend(settings.cors_headers_list)
+    # Add custom headers from settings if they exist (dict.fromkeys de-dups, keeping order)
+    custom_headers = settings.cors_headers_list
+    if custom_headers != ["*"]:
+        security_headers = list(dict.fromkeys((*SECURITY_HEADERS, *custom_headers)))
+    else:
+        security_headers = list(SECURITY_HEADERS)
 
     # noinspection PyTypeChecker
     app.add_middleware(
@@ -56,7 +60,7 @@ def setup_cors(app: FastAPI) -> None:
         allow_credentials=settings.CORS_CREDENTIALS,
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
         allow_headers=security_headers,
-        expose_headers=exposed_headers,
+        expose_headers=list(EXPOSED_HEADERS),
         max_age=3600,
         allow_origin_regex=None  # Add specific regex pattern if needed
     )
\ No newline at end of file
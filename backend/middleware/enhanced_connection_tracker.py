@@ -1,18 +1,28 @@
 # backend/middleware/enhanced_connection_tracker.py
-from datetime import datetime, timedelta, UTC
-from typing import Dict, Set, Optional
+from typing import Dict, Optional, Tuple
 import asyncio
 import logging
+import time
 from dataclasses import dataclass
-from collections import defaultdict
+from collections import Counter, defaultdict
 
 logger = logging.getLogger(__name__)
 
+# Concurrent callers within this many seconds share one metrics snapshot
+METRICS_TTL = 0.1
 
-@dataclass
+# Connections still tracked after this many seconds are treated as leaked
+STALE_CONNECTION_SECONDS = 300.0
+
+# Idle (fully refilled) buckets are evicted once the dict reaches this size; if too few were idle,
+# the next sweep waits until the dict has doubled, so sweeps stay amortized O(1) per insert
+MAX_RATE_LIMIT_BUCKETS = 10_000
+
+
+@dataclass(slots=True)
 class ConnectionInfo:
-    request_id: str
-    start_time: datetime
+    request_id: int
+    start_time: float  # time.monotonic() when the connection was added
     endpoint: str
     source_ip: str
     port: int
@@ -20,61 +30,102 @@ class ConnectionInfo:
     user_id: Optional[int] = None
 
 
-class RateLimitInfo:
-    def __init__(self, window_seconds: int = 60):
-        self.requests = []
-        self.window_seconds = window_seconds
-
-    def add_request(self) -> None:
-        current_time = datetime.now(UTC)
-        self.clean_old_requests(current_time)
-        self.requests.append(current_time)
-
-    def clean_old_requests(self, current_time: datetime) -> None:
-        cutoff = current_time - timedelta(seconds=self.window_seconds)
-        self.requests = [ts for ts in self.requests if ts > cutoff]
-
-    def get_request_count(self) -> int:
-        self.clean_old_requests(datetime.now(UTC))
-        return len(self.requests)
+class TokenBucket:
+    """Per-(ip, endpoint) rate limit state, refilled lazily on each check"""
+    __slots__ = ("tokens", "last", "last_logged")
 
-    def would_exceed_limit(self, limit: int) -> bool:
-        """Check if adding a request would exceed the limit"""
-        return self.get_request_count() >= limit
-
-
-def _get_rate_limit_key(source_ip: str, endpoint: str) -> str:
-    """Generate a consistent key for rate limiting"""
-    return f"{source_ip}:{endpoint}"
+    def __init__(self, tokens: float, last: float):
+        self.tokens = tokens
+        self.last = last
+        self.last_logged = float("-inf")  # When a rejection on this bucket was last logged
 
 
 class EnhancedConnectionTracker:
     def __init__(self):
-        self.active_connections: Dict[str, ConnectionInfo] = {}
-        self.endpoint_stats: Dict[str, int] = defaultdict(int)
-        self.ip_stats: Dict[str, Set[str]] = defaultdict(set)
-        self.rate_limits: Dict[str, RateLimitInfo] = defaultdict(lambda: RateLimitInfo())
-        self._lock = asyncio.Lock()
-        self._cleanup_task = None
+        self.active_connections: Dict[int, ConnectionInfo] = {}
+        self.endpoint_stats: Dict[str, int] = {}  # Only endpoints with active connections; read with .get()
+        # source_ip -> {endpoint: active connections}; entries are dropped as they reach zero
+        self.ip_stats: Dict[str, Counter[str]] = defaultdict(Counter)
+        self.rate_limits: Dict[Tuple[str, str], TokenBucket] = {}
+        self._evict_buckets_at = MAX_RATE_LIMIT_BUCKETS  # High-water mark for the next idle-bucket sweep
+        # Running aggregates kept in step with active_connections / ip_stats on add and remove
+        self._authenticated_count = 0
+        self._start_time_sum = 0.0
+        self._endpoints_per_ip: Dict[str, int] = {}
+        # Wakes the cleanup loop when the first connection arrives; created by that loop, on its own
+        # event loop, because this tracker is a module-level singleton built at import time
+        self._has_connections: Optional[asyncio.Event] = None
+        self._metrics_cache: Optional[Dict] = None
+        self._metrics_cached_at = 0.0
 
     @property
     def connection_count(self) -> int:
         """Maintain compatibility with existing code"""
         return len(self.active_connections)
 
-    async def _get_or_create_rate_limit_info(
+    def _register(
         self,
-        key: str,
-        window: int
-    ) -> RateLimitInfo:
-        """Get or create a RateLimitInfo instance with the specified window"""
-        if key not in self.rate_limits or self.rate_limits[key].window_seconds != window:
-            self.rate_limits[key] = RateLimitInfo(window_seconds=window)
-        return self.rate_limits[key]
-
-    async def add_connection(
+        request_id: int,
+        endpoint: str,
+        source_ip: str,
+        port: int,
+        is_authenticated: bool,
+        user_id: Optional[int]
+    ) -> None:
+        """Record a new active connection"""
+        start_time = time.monotonic()
+        self.active_connections[request_id] = ConnectionInfo(
+            request_id=request_id,
+            start_time=start_time,
+            endpoint=endpoint,
+            source_ip=source_ip,
+            port=port,
+            is_authenticated=is_authenticated,
+            user_id=user_id
+        )
+        self.endpoint_stats[endpoint] = self.endpoint_stats.get(endpoint, 0) + 1
+        self._start_time_sum += start_time
+        if self._has_connections is not None:
+            self._has_connections.set()
+        if is_authenticated:
+            self._authenticated_count += 1
+
+        ip_endpoints = self.ip_stats[source_ip]
+        ip_endpoints[endpoint] += 1
+        self._endpoints_per_ip[source_ip] = len(ip_endpoints)
+        logger.debug("Added connection %d. Total active: %d", request_id, len(self.active_connections))
+
+    def _take_token(self, source_ip: str, endpoint: str, limit: int, window: int) -> bool:
+        """Spend one token from the (source_ip, endpoint) bucket"""
+        now = time.monotonic()
+        key = (source_ip, endpoint)
+
+        bucket = self.rate_limits.get(key)
+        if bucket is None:
+            if len(self.rate_limits) >= self._evict_buckets_at:
+                self._evict_idle_buckets(now, window)
+                self._evict_buckets_at = max(MAX_RATE_LIMIT_BUCKETS, 2 * len(self.rate_limits))
+            self.rate_limits[key] = TokenBucket(limit - 1, now)
+            return True
+
+        bucket.tokens = min(limit, bucket.tokens + (now - bucket.last) * limit / window)
+        bucket.last = now
+        if bucket.tokens < 1:
+            # Log at most one rejection per bucket per window, so a flood can't flood the logs too
+            if now - bucket.last_logged >= window:
+                bucket.last_logged = now
+                logger.warning(
+                    "Rate limit exceeded for %s on %s (limit: %d requests per %d seconds)",
+                    source_ip, endpoint, limit, window
+                )
+            return False
+
+        bucket.tokens -= 1
+        return True
+
+    def add_connection(
         self,
-        request_id: str,
+        request_id: int,
         endpoint: str,
         source_ip: str,
         port: int,
@@ -82,115 +133,163 @@ class EnhancedConnectionTracker:
         user_id: Optional[int] = None
     ):
         """Enhanced version of add_connection with more metadata"""
-        async with self._lock:
-            self.active_connections[request_id] = ConnectionInfo(
-                request_id=request_id,
-                start_time=datetime.now(UTC),
-                endpoint=endpoint,
-                source_ip=source_ip,
-                port=port,
-                is_authenticated=is_authenticated,
-                user_id=user_id
-            )
-            self.endpoint_stats[endpoint] += 1
-            self.ip_stats[source_ip].add(endpoint)
-            logger.debug(f"Added connection {request_id}. Total active: {self.connection_count}")
-
-    async def remove_connection(self, request_id: str) -> Optional[float]:
+        self._register(request_id, endpoint, source_ip, port, is_authenticated, user_id)
+
+    def _unregister(self, conn_info: ConnectionInfo) -> None:
+        """Undo _register's aggregate updates for a connection already popped from active_connections"""
+        remaining = self.endpoint_stats.get(conn_info.endpoint, 0) - 1
+        if remaining > 0:
+            self.endpoint_stats[conn_info.endpoint] = remaining
+        else:
+            self.endpoint_stats.pop(conn_info.endpoint, None)
+        self._start_time_sum -= conn_info.start_time
+        if conn_info.is_authenticated:
+            self._authenticated_count -= 1
+
+        source_ip = conn_info.source_ip
+        ip_endpoints = self.ip_stats[source_ip]
+        ip_endpoints[conn_info.endpoint] -= 1
+        if not ip_endpoints[conn_info.endpoint]:
+            del ip_endpoints[conn_info.endpoint]
+            if ip_endpoints:
+                self._endpoints_per_ip[source_ip] = len(ip_endpoints)
+            else:
+                del self.ip_stats[source_ip]
+                del self._endpoints_per_ip[source_ip]
+
+        if not self.active_connections:
+            self._start_time_sum = 0.0  # Drop accumulated float error whenever we go idle
+
+    def remove_connection(self, request_id: int) -> Optional[float]:
         """Enhanced version that returns connection duration"""
-        async with self._lock:
-            if request_id in self.active_connections:
-                conn_info = self.active_connections[request_id]
-                duration = (datetime.now(UTC) - conn_info.start_time).total_seconds()
-                self.endpoint_stats[conn_info.endpoint] -= 1
-                del self.active_connections[request_id]
-                logger.debug(f"Removed connection {request_id}. Total active: {self.connection_count}")
-                return duration
-            return None
-
-    async def check_rate_limit(self, source_ip: str, endpoint: str, **kwargs) -> bool:
+        conn_info = self.active_connections.pop(request_id, None)
+        if conn_info is not None:
+            duration = time.monotonic() - conn_info.start_time
+            self._unregister(conn_info)
+            logger.debug("Removed connection %d. Total active: %d", request_id, len(self.active_connections))
+            return duration
+        return None
+
+    def check_rate_limit(
+        self,
+        source_ip: str,
+        endpoint: str,
+        limit: int = 100,
+        window: int = 60
+    ) -> bool:
         """
         Check if request should be rate limited
 
+        Token bucket per (source_ip, endpoint): holds up to `limit` tokens and
+        refills at `limit / window` tokens per second; each request spends one.
+
         Args:
             source_ip: The IP address of the request
             endpoint: The endpoint being accessed
-            **kwargs: Additional arguments including:
-                - limit: Maximum number of requests allowed in the window (default: 100)
-                - window: Time window in seconds for rate limiting (default: 60)
+            limit: Maximum burst of requests (bucket capacity)
+            window: Seconds to refill an empty bucket
         """
-        limit = kwargs.get('limit', 100)
-        window = kwargs.get('window', 60)
-
-        async with self._lock:
-            key = _get_rate_limit_key(source_ip, endpoint)
-            rate_limit_info = await self._get_or_create_rate_limit_info(key, window)
+        return self._take_token(source_ip, endpoint, limit, window)
 
-            if rate_limit_info.would_exceed_limit(limit):
-                logger.warning(f"Rate limit exceeded for {source_ip} on {endpoint}")
-                return False
+    def admit_connection(
+        self,
+        request_id: int,
+        endpoint: str,
+        source_ip: str,
+        port: int,
+        is_authenticated: bool = False,
+        user_id: Optional[int] = None,
+        limit: int = 100,
+        window: int = 60
+    ) -> bool:
+        """Rate-limit check plus add_connection in one call.
+        Returns False (and tracks nothing) when the request is rate limited."""
+        if not self._take_token(source_ip, endpoint, limit, window):
+            return False
+        self._register(request_id, endpoint, source_ip, port, is_authenticated, user_id)
+        return True
+
+    def _evict_idle_buckets(self, now: float, window: int) -> None:
+        """Drop buckets idle for a full window; they have refilled and equal a new bucket"""
+        cutoff = now - window
+        idle = [key for key, bucket in self.rate_limits.items() if bucket.last <= cutoff]
+        for key in idle:
+            del self.rate_limits[key]
+
+    def get_metrics(self, detailed: bool = False) -> Dict:
+        """
+        Get comprehensive connection metrics (memoized for METRICS_TTL seconds; treat as read-only)
 
-            rate_limit_info.add_request()
-            return True
+        Counts come from running aggregates. Pass detailed=True to also get the
+        per-connection "connection_durations" map, which walks every connection.
+        """
+        now = time.monotonic()
+        if not detailed and self._metrics_cache is not None and now - self._metrics_cached_at < METRICS_TTL:
+            return self._metrics_cache
 
-    def get_metrics(self) -> Dict:
-        """Get comprehensive connection metrics"""
         total_connections = len(self.active_connections)
-        authenticated_connections = sum(
-            1 for conn in self.active_connections.values()
-            if conn.is_authenticated
-        )
+        authenticated_connections = self._authenticated_count
 
-        current_time = datetime.now(UTC)
         metrics = {
             "total_active_connections": total_connections,
             "authenticated_connections": authenticated_connections,
             "anonymous_connections": total_connections - authenticated_connections,
             "per_endpoint_connections": dict(self.endpoint_stats),
             "unique_ips": len(self.ip_stats),
-            "endpoints_per_ip": {
-                ip: len(endpoints) for ip, endpoints in self.ip_stats.items()
-            },
-            "connection_durations": {
-                conn_id: (current_time - conn.start_time).total_seconds()
+            "endpoints_per_ip": dict(self._endpoints_per_ip),
+            # Mean age of the active connections: now minus the mean start time
+            "avg_connection_duration": (
+                now - self._start_time_sum / total_connections if total_connections else 0.0
+            )
+        }
+        if detailed:
+            metrics["connection_durations"] = {
+                conn_id: now - conn.start_time
                 for conn_id, conn in self.active_connections.items()
             }
-        }
+            return metrics
+
+        self._metrics_cache = metrics
+        self._metrics_cached_at = now
         return metrics
 
     async def cleanup_stale_connections(self):
-        """Enhanced cleanup that maintains all tracking information"""
+        """Remove connections tracked for longer than STALE_CONNECTION_SECONDS.
+
+        active_connections is insertion-ordered and start times only grow, so its
+        first entry is always the oldest: the loop sleeps until that entry would go
+        stale, and waits on an event (no wakeups at all) while nothing is tracked.
+        """
+        self._has_connections = asyncio.Event()
         while True:
             try:
-                await asyncio.sleep(60)
-                current_time = datetime.now(UTC)
-                stale_threshold = current_time - timedelta(minutes=5)
-
-                async with self._lock:
-                    stale_connections = [
-                        conn_id for conn_id, conn in self.active_connections.items()
-                        if conn.start_time < stale_threshold
-                    ]
-
-                    for conn_id in stale_connections:
-                        await self.remove_connection(conn_id)
-                        logger.info(f"Removed stale connection {conn_id}")
+                if not self.active_connections:
+                    self._has_connections.clear()
+                    await self._has_connections.wait()
+                    continue
+
+                oldest = next(iter(self.active_connections.values()))
+                delay = oldest.start_time + STALE_CONNECTION_SECONDS - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+
+                # Only the expired prefix of the dict is visited; collect first, then remove
+                stale_threshold = time.monotonic() - STALE_CONNECTION_SECONDS
+                stale_connections = []
+                for conn_id, conn in self.active_connections.items():
+                    if conn.start_time >= stale_threshold:
+                        break
+                    stale_connections.append(conn_id)
+
+                # Removed in one batch, with one log line rather than one per connection
+                for conn_id in stale_connections:
+                    self._unregister(self.active_connections.pop(conn_id))
+                logger.info(f"Removed {len(stale_connections)} stale connection(s)")
 
             except Exception as e:
                 logger.error(f"Error in connection cleanup: {str(e)}")
-
-    async def start_cleanup_task(self):
-        """Start the background cleanup task"""
-        self._cleanup_task = asyncio.create_task(self.cleanup_stale_connections())
-
-    async def stop_cleanup_task(self):
-        """Stop the background cleanup task"""
-        if self._cleanup_task:
-            self._cleanup_task.cancel()
-            try:
-                await self._cleanup_task
-            except asyncio.CancelledError:
-                pass
+                await asyncio.sleep(1)  # Don't spin if the error repeats
 
 
 # Create global instance
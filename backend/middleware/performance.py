@@ -1,35 +1,54 @@
 # middleware/performance.py
 
-import time
+from time import perf_counter  # Monotonic and high resolution, unlike time.time()
 import logging
-from fastapi import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from workers.performance_worker import record_request_metrics
 
 logger = logging.getLogger(__name__)
 
 
-async def record_performance_metrics(request: Request, call_next):
-    """Middleware to record performance metrics for each request"""
-    start_time = time.time()
+class PerformanceMetricsMiddleware:
+    """Pure ASGI middleware to record performance metrics for each request"""
 
-    try:
-        response = await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        # Calculate response time
-        response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        # Record metrics asynchronously
-        try:
-            await record_request_metrics(
-                request=request,
-                response_time=response_time,
-                status_code=response.status_code
-            )
-        except Exception as e:
-            logger.error(f"Failed to record metrics: {str(e)}")
+        path = scope["path"]  # Read once from the scope; no Request object or URL parsing needed
+        start_time = perf_counter()
+        status_code = 500
 
-        return response
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
-    except Exception as e:
-        logger.error(f"Error in performance middleware: {str(e)}")
-        raise  # Re-raise the exception to maintain normal error handling
\ No newline at end of file
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            status_code = 500  # The catch-all handler turns this into a 500 outside this middleware
+            logger.error(f"Error in performance middleware: {str(e)}")
+            raise  # Re-raise the exception to maintain normal error handling
+        finally:
+            # Calculate response time
+            response_time = (perf_counter() - start_time) * 1000  # Convert to milliseconds
+
+            # Queue metrics, including failed requests (non-blocking; written in batches by the worker).
+            # The queue lives on app.state and only exists while the lifespan is running.
+            try:
+                metrics_queue = getattr(scope["app"].state, "metrics_queue", None)
+                if metrics_queue is not None:
+                    record_request_metrics(
+                        metrics_queue,
+                        endpoint=path,
+                        response_time=response_time,
+                        status_code=status_code
+                    )
+            except Exception as e:
+                logger.error(f"Failed to record metrics: {str(e)}")
@@ -8,7 +8,8 @@ class ServerPerformance(Base):
     __table_args__ = {'extend_existing': True}
 
     id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    # UTC from Python, not NOW() (MySQL session timezone), so every row and query filter agree
+    timestamp = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc), index=True)
     cpu_usage = Column(Float, nullable=False)
     memory_usage = Column(Float, nullable=False)
     disk_usage = Column(Float, nullable=False)
@@ -1,6 +1,7 @@
 import enum
+from functools import cached_property
 
-from sqlalchemy import Column, Integer, String, Enum, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Enum, DateTime, JSON, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -35,7 +36,7 @@ class User(Base):
     last_login = Column(DateTime(timezone=True), nullable=True)
 
     # Fields for password reset
-    reset_token = Column(String(64), nullable=True)
+    reset_token = Column(String(64), nullable=True, index=True)
     reset_token_expiry = Column(DateTime(timezone=True), nullable=True)
 
     # Store last 5 passwords as JSON
@@ -65,6 +66,16 @@ class User(Base):
             "last_login": self.last_login.isoformat() if self.last_login else None
         }
 
+    @cached_property
+    def roles_set(self) -> frozenset:
+        """Uppercase role values, parsed once per instance for membership checks"""
+        roles = self.roles.split(',') if isinstance(self.roles, str) else (self.roles or [])
+        return frozenset(role.strip().upper() for role in roles)
+
+    def has_role(self, role) -> bool:
+        """Check a role (UserRole or its string value) against the cached roles_set"""
+        return (role.value if isinstance(role, UserRole) else role) in self.roles_set
+
     @property
     def role_list(self):
         """Convert comma-separated roles string to list of UserRole enums"""
@@ -79,4 +90,10 @@ class User(Base):
             self.roles = ""
         else:
             role_values = [r.value if isinstance(r, UserRole) else r for r in roles]
-            self.roles = ','.join(role_values)
\ No newline at end of file
+            self.roles = ','.join(role_values)
+
+
+@event.listens_for(User.roles, "set")
+def _invalidate_roles_set(target, value, oldvalue, initiator):
+    """Drop the cached roles_set whenever roles is assigned, so it is re-parsed on next use"""
+    target.__dict__.pop("roles_set", None)
@@ -1,15 +1,16 @@
 
 import secrets
+from datetime import datetime, UTC
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Response, status
-from sqlalchemy import func, text
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from db.session import get_db
 from random_password import PasswordGenerator
-from services.auth_service import AuthService
-from services.password_service import PasswordService
+from services.auth_service import AuthService, RESET_TOKEN_TTL
+from services import password_service
 from services.user_service import UserService
 from templates.email.password_reset_template import send_recovery_email
 from schemas.user import (
@@ -41,7 +42,7 @@ def get_user_or_404(db: Session, user_id: Optional[int] = None, email: Optional[
 
 def create_reset_token(db: Session, user):
     reset_token = secrets.token_urlsafe(32)
-    reset_token_expiry = db.query(func.now() + text("INTERVAL 1 HOUR")).scalar()
+    reset_token_expiry = datetime.now(UTC) + RESET_TOKEN_TTL
 
     user.reset_token = reset_token
     user.reset_token_expiry = reset_token_expiry
@@ -53,7 +54,8 @@ def create_reset_token(db: Session, user):
 @router.post("/login")
 async def login(user_login: UserLogin, response: Response, db: Session = Depends(get_db)):
     try:
-        result = AuthService(db).login(user_login.username, user_login.password)
+        # bcrypt (and the sync session) would block the event loop, so run on the threadpool
+        result = await run_in_threadpool(AuthService(db).login, user_login.username, user_login.password)
 
         # Add CORS headers explicitly
         response.headers["Access-Control-Allow-Origin"] = "http://localhost:5173"
@@ -80,12 +82,14 @@ async def password_recovery(
 
 @router.post("/update-password")
 async def update_password(request: PasswordUpdateRequest, db: Session = Depends(get_db)):
-    user = get_user_or_404(
+    user = await run_in_threadpool(
+        get_user_or_404,
         db,
         user_id=request.user_id,
         reset_token=request.token
     )
-    return AuthService(db).update_password(
+    return await run_in_threadpool(
+        AuthService(db).update_password,
         user,
         request.new_password,
         request.current_password
@@ -100,9 +104,10 @@ async def check_password_history(request: dict, db: Session = Depends(get_db)):
             detail="User ID and new password are required"
         )
 
-    user = get_user_or_404(db, user_id=request["user_id"])
+    user = await run_in_threadpool(get_user_or_404, db, user_id=request["user_id"])
 
-    if not PasswordService.check_password_history(
+    if not await run_in_threadpool(
+            password_service.check_password_history,
             request["new_password"],
             user.last_passwords or []
     ):
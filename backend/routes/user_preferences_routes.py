@@ -5,7 +5,7 @@ from sqlalchemy import inspect
 
 from auth import get_current_user
 from db.session import get_db
-from models.user import User
+from models.user import User, UserRole
 from models.user_preferences import UserPreferences
 from schemas.user_preferences import (
     UserPreferencesUpdate,
@@ -28,7 +28,7 @@ async def get_user_preferences(
         db: Session = Depends(get_db)
 ):
     """Get a user's preferences"""
-    if current_user.id != user_id and "ADMIN" not in current_user.roles:
+    if current_user.id != user_id and not current_user.has_role(UserRole.ADMIN):
         raise HTTPException(status_code=403, detail="Not authorized to access these preferences")
 
     preferences = db.query(UserPreferences).filter(UserPreferences.user_id == user_id).first()
@@ -50,7 +50,7 @@ async def update_user_preferences(
         db: Session = Depends(get_db)
 ):
     """Update a user's preferences"""
-    if current_user.id != user_id and "ADMIN" not in current_user.roles:
+    if current_user.id != user_id and not current_user.has_role(UserRole.ADMIN):
         raise HTTPException(status_code=403, detail="Not authorized to update these preferences")
 
     preferences = db.query(UserPreferences).filter(UserPreferences.user_id == user_id).first()
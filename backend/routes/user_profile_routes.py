@@ -4,11 +4,10 @@ from typing import List, TypeVar, Type, Optional, Any, Dict, Union
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import inspect, select
-from sqlalchemy.sql import func
 
 from auth import get_current_user
 from db.session import get_db
-from models.user import User
+from models.user import User, UserRole
 from models.user_profile import UserProfile, UserAddress
 from schemas.user_profile import (
     UserProfileUpdate,
@@ -26,17 +25,9 @@ ModelType = TypeVar("ModelType", UserProfile, UserAddress)
 SchemaType = TypeVar("SchemaType", UserProfileUpdate, UserAddressCreate)
 
 
-def check_authorization(db: Session, current_user: User, user_id: int, action: str) -> None:
-    """Check if user is authorized to perform an action"""
-    stmt = select(User).where(
-        (User.id == current_user.id) &
-        ((User.id == user_id) |
-         func.json_contains(User.roles, func.json_quote('ADMIN')))
-    )
-
-    authorized_user = db.execute(stmt).scalar_one_or_none()
-
-    if not authorized_user:
+def check_authorization(current_user: User, user_id: int, action: str) -> None:
+    """Check if user is authorized to perform an action (the user's own data, or any as admin)"""
+    if current_user.id != user_id and not current_user.has_role(UserRole.ADMIN):
         logger.error(f"User {current_user.id} not authorized to {action} for user {user_id}")
         raise HTTPException(status_code=403, detail=f"Not authorized to {action}")
 
@@ -187,7 +178,7 @@ async def handle_crud_operation(
     try:
         action_map = {"get": "access", "create": "create", "update": "update", "delete": "delete"}
         action = action_map[operation]
-        check_authorization(db, current_user, user_id, action)
+        check_authorization(current_user, user_id, action)
 
         if operation in ["create", "update"]:
             get_user_or_404(db, user_id)
@@ -3,6 +3,7 @@ import logging
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from auth import get_current_user, check_admin
@@ -82,8 +83,8 @@ async def create_user(
                 detail="User with this username already exists"
             )
 
-        # Create user
-        new_user = user_service.create_user(user_dict)
+        # Create user (bcrypt-hashes the password, so keep it off the event loop)
+        new_user = await run_in_threadpool(user_service.create_user, user_dict)
 
         # Queue welcome email
         try:
@@ -1,23 +1,27 @@
 
 import logging
 import secrets
-from typing import Dict, Any, List
+from datetime import datetime, timedelta, UTC
+from typing import Dict, Any, List, Optional
 
 from fastapi import HTTPException, status
-from sqlalchemy import func, text
 from sqlalchemy.orm import Session
 
 from auth import create_token
 from models.user import User, UserStatus, UserRole
-from services.password_service import PasswordService
+from services.password_service import (
+    check_password_history, hash_password, update_password_history, verify_and_update, verify_password
+)
 from services.user_service import UserService
 
+# Lifetime of a password reset token
+RESET_TOKEN_TTL = timedelta(hours=1)
+
 
 class AuthService:
     def __init__(self, db: Session):
         self.db = db
         self.user_service = UserService(db)
-        self.password_service = PasswordService()
 
     @staticmethod
     def _validate_roles(role: str) -> bool:
@@ -39,8 +43,8 @@ class AuthService:
         return processed_roles
 
     @staticmethod
-    def _handle_login_checks(user: User, password_service: PasswordService,
-                             password: str) -> None:
+    def _handle_login_checks(user: User, password: str) -> Optional[str]:
+        """Raise on failed login; return a replacement hash if the stored one needs upgrading"""
         if not user:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                 detail="Invalid username or password")
@@ -49,27 +53,34 @@ class AuthService:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                 detail="Account is not active")
 
-        if not password_service.verify_password(password, user.hashed_password):
+        valid, new_hash = verify_and_update(password, user.hashed_password)
+        if not valid:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                 detail="Invalid username or password")
+        return new_hash
 
     def login(self, username: str, password: str) -> Dict[str, Any]:
         try:
-            user = self.user_service.get_user_by_username(username)
-            self._handle_login_checks(user, self.password_service, password)
+            user = self.user_service.get_user_for_login(username)
+            new_hash = self._handle_login_checks(user, password)
+            if new_hash:
+                user.hashed_password = new_hash  # Saved by update_last_login's commit
 
-            self.user_service.update_last_login(user)
+            # Read before the commit below expires the instance, which would reload the row
+            user_id, user_name = user.id, user.user_name
             user_roles = self._process_roles(user.roles)
 
+            self.user_service.update_last_login(user)
+
             token = create_token({
-                "sub": user.user_name,
+                "sub": user_name,
                 "roles": user_roles,
-                "user_id": user.id
+                "user_id": user_id
             })
 
             return {
                 "message": "Login successful",
-                "user_id": user.id,
+                "user_id": user_id,
                 "roles": user_roles,
                 "access_token": token,
                 "token_type": "bearer"
@@ -88,7 +99,7 @@ class AuthService:
                 return {"message": "If the email exists, a recovery link will be sent."}
 
             token = secrets.token_urlsafe(32)
-            expiry_time = self.db.query(func.now() + text("INTERVAL 1 HOUR")).scalar()
+            expiry_time = datetime.now(UTC) + RESET_TOKEN_TTL
 
             user.reset_token = token
             user.reset_token_expiry = expiry_time
@@ -104,33 +115,37 @@ class AuthService:
     def update_password(self, user: User, new_password: str,
                         current_password: str = None) -> Dict[str, Any]:
         try:
-            if current_password and not self.password_service.verify_password(
+            if current_password and not verify_password(
                     current_password, user.hashed_password):
                 raise HTTPException(status_code=400,
                                     detail="Current password is incorrect")
 
-            if not self.password_service.check_password_history(
+            if not check_password_history(
                     new_password, user.last_passwords):
                 raise HTTPException(status_code=400,
                                     detail="Cannot use any of your last 5 passwords")
 
-            new_hash = self.password_service.hash_password(new_password)
-            new_history = self.password_service.update_password_history(
+            new_hash = hash_password(new_password)
+            new_history = update_password_history(
                 user.hashed_password, user.last_passwords)
 
-            update_data = {
-                "hashed_password": new_hash,
-                "last_passwords": new_history,
-                "reset_token": None,
-                "reset_token_expiry": None
-            }
+            # Set on the already-loaded user and flush in one UPDATE; update_user would also
+            # re-SELECT the row after commit and skip the None values that clear the reset token
+            user.hashed_password = new_hash
+            user.last_passwords = new_history
+            user.reset_token = None
+            user.reset_token_expiry = None
 
             status_updated = False
             if user.status == UserStatus.PENDING:
-                update_data["status"] = UserStatus.ACTIVE
+                user.status = UserStatus.ACTIVE
                 status_updated = True
 
-            self.user_service.update_user(user, update_data)
+            try:
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
 
             return {
                 "message": "Password updated successfully",
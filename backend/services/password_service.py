@@ -1,33 +1,106 @@
 
-from typing import List
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Tuple
 
 import bcrypt
+from cachetools import TTLCache
 
+from config import get_settings
 
-class PasswordService:
-    @staticmethod
-    def hash_password(password: str) -> str:
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+# bcrypt cost factor, read once rather than on every hash
+BCRYPT_ROUNDS = get_settings().BCRYPT_ROUNDS
 
-    @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+# Recent bcrypt results: HMAC(plain password + hash) -> _NO_MATCH / _MATCH / _LEGACY_MATCH.
+# checkpw is a pure function of its inputs, so a hit is never stale; a new hash simply misses.
+# Keys are HMACed with a per-process secret so the cache never holds a replayable password digest.
+_VERIFY_CACHE = TTLCache(maxsize=10000, ttl=300)
+_VERIFY_CACHE_LOCK = threading.Lock()
+_VERIFY_CACHE_KEY = secrets.token_bytes(32)
 
-    @staticmethod
-    def check_password_history(new_password: str, password_history: List[str]) -> bool:
-        if not password_history:
-            return True
+# Outcomes of _check_password
+_NO_MATCH = 0
+_MATCH = 1
+_LEGACY_MATCH = 2  # Matched a hash of the raw password, stored before pre-hashing was introduced
 
-        for old_password in password_history:
-            if PasswordService.verify_password(new_password, old_password):
+# Pre-hashed hashes are stored with bcrypt's "$2b$" version tag swapped for this marker (same
+# 60-character length), so legacy raw-password hashes can be told apart without trying both forms
+PREHASH_PREFIX = b"$ph$"
+_BCRYPT_PREFIX = b"$2b$"
+
+# Password history holds at most 5 hashes; bcrypt releases the GIL, so they are checked in parallel
+_HISTORY_EXECUTOR = ThreadPoolExecutor(max_workers=5, thread_name_prefix="password-history")
+
+
+def prehash_password(password: str) -> bytes:
+    """base64(SHA-256(password)): a fixed 44-byte bcrypt input, so nothing past bcrypt's 72-byte limit is ignored"""
+    return base64.b64encode(hashlib.sha256(password.encode('utf-8')).digest())
+
+
+def _check_password(plain_password: str, hashed_password: str) -> int:
+    """Match against a stored hash, pre-hashing the candidate only for "$ph$"-marked hashes"""
+    plain_bytes = plain_password.encode('utf-8')
+    hashed_bytes = hashed_password.encode('utf-8')
+    cache_key = hmac.new(_VERIFY_CACHE_KEY, hashed_bytes + b"|" + plain_bytes, hashlib.sha256).digest()
+
+    with _VERIFY_CACHE_LOCK:
+        cached = _VERIFY_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # One checkpw (constant-time compare) per check, whichever form the hash is in
+    if hashed_bytes.startswith(PREHASH_PREFIX):
+        bcrypt_hash = _BCRYPT_PREFIX + hashed_bytes[len(PREHASH_PREFIX):]
+        result = _MATCH if bcrypt.checkpw(prehash_password(plain_password), bcrypt_hash) else _NO_MATCH
+    else:
+        result = _LEGACY_MATCH if bcrypt.checkpw(plain_bytes, hashed_bytes) else _NO_MATCH
+    with _VERIFY_CACHE_LOCK:
+        _VERIFY_CACHE[cache_key] = result
+    return result
+
+
+def hash_password(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    hashed = bcrypt.hashpw(prehash_password(password), salt)
+    return (PREHASH_PREFIX + hashed[len(_BCRYPT_PREFIX):]).decode('utf-8')
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return _check_password(plain_password, hashed_password) != _NO_MATCH
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify, and return a pre-hashed replacement when the stored hash is in the legacy form"""
+    result = _check_password(plain_password, hashed_password)
+    if result == _LEGACY_MATCH:
+        return True, hash_password(plain_password)
+    return result == _MATCH, None
+
+
+def check_password_history(new_password: str, password_history: List[str]) -> bool:
+    if not password_history:
+        return True
+
+    futures = [
+        _HISTORY_EXECUTOR.submit(verify_password, new_password, old_password)
+        for old_password in password_history
+    ]
+    try:
+        for future in as_completed(futures):
+            if future.result():
                 return False
         return True
+    finally:
+        for future in futures:
+            future.cancel()  # No-op for finished ones; skips any still queued after a match
+
 
-    @staticmethod
-    def update_password_history(current_hash: str, history: List[str]) -> List[str]:
-        if history is None:
-            history = []
-        new_history = history + [current_hash]
-        return new_history[-5:]  # Keep last 5 passwords
\ No newline at end of file
+def update_password_history(current_hash: str, history: List[str]) -> List[str]:
+    if history is None:
+        history = []
+    new_history = history + [current_hash]
+    return new_history[-5:]  # Keep last 5 passwords
\ No newline at end of file
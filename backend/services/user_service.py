@@ -5,16 +5,15 @@ from datetime import datetime, timedelta, UTC
 from typing import Optional, Dict, Any, Type
 
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 
 from models import User, UserRole
-from services.password_service import PasswordService
+from services.password_service import hash_password
 
 
 class UserService:
     def __init__(self, db: Session):
         self.db = db
-        self.password_service = PasswordService()
 
     def get_user_by_id(self, user_id: int) -> Optional[User]:
         return self.db.query(User).filter(User.id == user_id).first()
@@ -25,6 +24,15 @@ class UserService:
     def get_user_by_username(self, username: str) -> Optional[User]:
         return self.db.query(User).filter(User.user_name == username).first()
 
+    def get_user_for_login(self, username: str) -> Optional[User]:
+        """Username lookup that loads only the columns login reads (no JSON history, audit fields)"""
+        return (
+            self.db.query(User)
+            .options(load_only(User.id, User.user_name, User.hashed_password, User.roles, User.status))
+            .filter(User.user_name == username)
+            .first()
+        )
+
     def get_user_by_reset_token(self, token: str) -> Optional[User]:
         return self.db.query(User).filter(User.reset_token == token).first()
 
@@ -53,7 +61,7 @@ class UserService:
 
             # Hash the password
             if 'password' in user_data:
-                user_data['hashed_password'] = self.password_service.hash_password(
+                user_data['hashed_password'] = hash_password(
                     user_data.pop('password')
                 )
 
@@ -0,0 +1,24 @@
+# tests/conftest.py
+import os
+
+# Settings() requires these; tests that import config-dependent modules get harmless defaults
+# (a real .env or environment still takes precedence)
+for _name, _value in {
+    "ENVIRONMENT": "development",
+    "MYSQL_HOST": "localhost",
+    "MYSQL_PORT": "3306",
+    "MYSQL_USER": "test",
+    "MYSQL_PASSWORD": "test",
+    "MYSQL_DATABASE": "test",
+    "EMAIL_HOST": "localhost",
+    "EMAIL_PORT": "25",
+    "EMAIL_USERNAME": "test@example.com",
+    "EMAIL_PASSWORD": "test",
+    "EMAIL_FROM": "test@example.com",
+    "JWT_PRIVATE_KEY_PATH": __file__,
+    "JWT_PUBLIC_KEY_PATH": __file__,
+    "INITIAL_USER": "admin",
+    "INITIAL_PASSWORD": "Password123",
+    "BCRYPT_ROUNDS": "4",  # Minimum cost keeps hashing tests fast
+}.items():
+    os.environ.setdefault(_name, _value)
@@ -0,0 +1,174 @@
+# tests/test_enhanced_connection_tracker.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from middleware import enhanced_connection_tracker
+from middleware.enhanced_connection_tracker import EnhancedConnectionTracker
+
+
+class FakeClock:
+    """Stand-in for time.monotonic() that only moves when a test advances it"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Drive the tracker's clock by hand; only the tracker module sees it, not the event loop"""
+    fake = FakeClock()
+    monkeypatch.setattr(enhanced_connection_tracker, "time", SimpleNamespace(monotonic=fake))
+    return fake
+
+
+@pytest.fixture
+def tracker(clock):
+    return EnhancedConnectionTracker()
+
+
+def test_add_and_remove_keep_counts_exact(tracker, clock):
+    tracker.add_connection(1, "/api/users", "10.0.0.1", 5001, is_authenticated=True, user_id=7)
+    tracker.add_connection(2, "/api/users", "10.0.0.2", 5002)
+    tracker.add_connection(3, "/api/items", "10.0.0.1", 5003)
+
+    metrics = tracker.get_metrics(detailed=True)
+    assert metrics["total_active_connections"] == 3
+    assert metrics["authenticated_connections"] == 1
+    assert metrics["anonymous_connections"] == 2
+    assert metrics["per_endpoint_connections"] == {"/api/users": 2, "/api/items": 1}
+    assert metrics["unique_ips"] == 2
+    assert metrics["endpoints_per_ip"] == {"10.0.0.1": 2, "10.0.0.2": 1}
+
+    clock.advance(4)
+    assert tracker.remove_connection(1) == 4
+    assert tracker.remove_connection(1) is None
+
+    metrics = tracker.get_metrics(detailed=True)
+    assert metrics["total_active_connections"] == 2
+    assert metrics["authenticated_connections"] == 0
+    assert metrics["per_endpoint_connections"] == {"/api/users": 1, "/api/items": 1}
+    assert metrics["endpoints_per_ip"] == {"10.0.0.1": 1, "10.0.0.2": 1}
+
+
+def test_remove_prunes_empty_counters(tracker):
+    tracker.add_connection(1, "/api/users", "10.0.0.1", 5001)
+    tracker.add_connection(2, "/api/items", "10.0.0.1", 5002)
+
+    tracker.remove_connection(1)
+    assert dict(tracker.ip_stats) == {"10.0.0.1": {"/api/items": 1}}
+    assert tracker.endpoint_stats == {"/api/items": 1}
+
+    tracker.remove_connection(2)
+    assert not tracker.ip_stats
+    assert not tracker.endpoint_stats
+    assert not tracker._endpoints_per_ip
+    assert tracker.get_metrics(detailed=True)["unique_ips"] == 0
+
+
+def test_avg_connection_duration_tracks_start_times(tracker, clock):
+    tracker.add_connection(1, "/api/users", "10.0.0.1", 5001)
+    clock.advance(10)
+    tracker.add_connection(2, "/api/users", "10.0.0.1", 5002)
+    clock.advance(10)
+
+    # Ages are 20s and 10s
+    assert tracker.get_metrics(detailed=True)["avg_connection_duration"] == 15
+
+    tracker.remove_connection(1)
+    assert tracker.get_metrics(detailed=True)["avg_connection_duration"] == 10
+
+    tracker.remove_connection(2)
+    assert tracker._start_time_sum == 0.0
+    assert tracker.get_metrics(detailed=True)["avg_connection_duration"] == 0.0
+
+
+def test_get_metrics_is_memoized_for_ttl(tracker, clock):
+    first = tracker.get_metrics()
+    tracker.add_connection(1, "/api/users", "10.0.0.1", 5001)
+    assert tracker.get_metrics() is first
+
+    clock.advance(enhanced_connection_tracker.METRICS_TTL)
+    assert tracker.get_metrics()["total_active_connections"] == 1
+
+
+def test_stale_sweep_removes_only_expired_connections(tracker, clock):
+    stale_after = enhanced_connection_tracker.STALE_CONNECTION_SECONDS
+    tracker.add_connection(1, "/api/users", "10.0.0.1", 5001, is_authenticated=True)
+    tracker.add_connection(2, "/api/items", "10.0.0.2", 5002)
+    clock.advance(stale_after - 100)
+    tracker.add_connection(3, "/api/items", "10.0.0.1", 5003)
+    clock.advance(101)
+
+    async def sweep_once():
+        cleanup = asyncio.create_task(tracker.cleanup_stale_connections())
+        await asyncio.sleep(0)  # One pass: sweep, then sleep until connection 3 goes stale
+        cleanup.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cleanup
+
+    asyncio.run(sweep_once())
+
+    assert list(tracker.active_connections) == [3]
+    metrics = tracker.get_metrics(detailed=True)
+    assert metrics["total_active_connections"] == 1
+    assert metrics["authenticated_connections"] == 0
+    assert metrics["per_endpoint_connections"] == {"/api/items": 1}
+    assert metrics["endpoints_per_ip"] == {"10.0.0.1": 1}
+    assert metrics["avg_connection_duration"] == 101
+
+
+def test_bucket_runs_out_and_refills(tracker, clock):
+    for _ in range(3):
+        assert tracker.check_rate_limit("10.0.0.1", "/api/users", limit=3, window=30)
+    assert not tracker.check_rate_limit("10.0.0.1", "/api/users", limit=3, window=30)
+
+    # Other IPs and endpoints have their own buckets
+    assert tracker.check_rate_limit("10.0.0.2", "/api/users", limit=3, window=30)
+    assert tracker.check_rate_limit("10.0.0.1", "/api/items", limit=3, window=30)
+
+    clock.advance(10)  # One token back at 3 tokens per 30s
+    assert tracker.check_rate_limit("10.0.0.1", "/api/users", limit=3, window=30)
+    assert not tracker.check_rate_limit("10.0.0.1", "/api/users", limit=3, window=30)
+
+    clock.advance(300)  # Refill is capped at the bucket's capacity
+    for _ in range(3):
+        assert tracker.check_rate_limit("10.0.0.1", "/api/users", limit=3, window=30)
+    assert not tracker.check_rate_limit("10.0.0.1", "/api/users", limit=3, window=30)
+
+
+def test_rejected_admission_tracks_nothing(tracker):
+    assert tracker.admit_connection(1, "/api/users", "10.0.0.1", 5001, limit=1, window=60)
+    assert not tracker.admit_connection(2, "/api/users", "10.0.0.1", 5002, limit=1, window=60)
+
+    assert list(tracker.active_connections) == [1]
+    assert tracker.endpoint_stats == {"/api/users": 1}
+
+
+def test_idle_buckets_evicted_past_max(monkeypatch, clock):
+    monkeypatch.setattr(enhanced_connection_tracker, "MAX_RATE_LIMIT_BUCKETS", 2)
+    tracker = EnhancedConnectionTracker()
+
+    tracker.check_rate_limit("10.0.0.1", "/api/users", limit=5, window=10)
+    tracker.check_rate_limit("10.0.0.2", "/api/users", limit=5, window=10)
+
+    # At the cap, but nothing has been idle for a window: nothing is evicted, and the
+    # next sweep waits until the dict has doubled
+    clock.advance(5)
+    tracker.check_rate_limit("10.0.0.3", "/api/users", limit=5, window=10)
+    assert len(tracker.rate_limits) == 3
+
+    clock.advance(20)
+    tracker.check_rate_limit("10.0.0.4", "/api/users", limit=5, window=10)
+    assert len(tracker.rate_limits) == 4
+
+    clock.advance(1)
+    tracker.check_rate_limit("10.0.0.5", "/api/users", limit=5, window=10)
+    assert set(tracker.rate_limits) == {("10.0.0.4", "/api/users"), ("10.0.0.5", "/api/users")}
@@ -0,0 +1,59 @@
+# tests/test_password_service.py
+import bcrypt
+import pytest
+
+from services import password_service
+
+
+@pytest.fixture(autouse=True)
+def empty_verify_cache():
+    """Every test starts with an empty verification cache (bcrypt cost comes from conftest)"""
+    password_service._VERIFY_CACHE.clear()
+
+
+@pytest.fixture
+def checkpw_calls(monkeypatch):
+    """Count bcrypt.checkpw runs made by password_service"""
+    calls = []
+    real_checkpw = bcrypt.checkpw
+
+    def counting_checkpw(password, hashed_password):
+        calls.append(hashed_password)
+        return real_checkpw(password, hashed_password)
+
+    monkeypatch.setattr(password_service.bcrypt, "checkpw", counting_checkpw)
+    return calls
+
+
+def test_legacy_hash_verifies_and_is_upgraded(checkpw_calls):
+    legacy_hash = bcrypt.hashpw(b"Legacy-Password1", bcrypt.gensalt(rounds=4)).decode("utf-8")
+
+    valid, new_hash = password_service.verify_and_update("Legacy-Password1", legacy_hash)
+
+    assert valid
+    assert len(checkpw_calls) == 1
+    assert new_hash is not None
+    assert new_hash.startswith(password_service.PREHASH_PREFIX.decode())
+    assert len(new_hash) == 60
+    assert password_service.verify_password("Legacy-Password1", new_hash)
+
+
+def test_prehashed_hash_verifies_without_fallback(checkpw_calls):
+    new_hash = password_service.hash_password("New-Password1")
+
+    valid, replacement = password_service.verify_and_update("New-Password1", new_hash)
+
+    assert valid
+    assert replacement is None
+    assert len(checkpw_calls) == 1
+
+
+@pytest.mark.parametrize("stored_hash", [
+    pytest.param(lambda: password_service.hash_password("Right-Password1"), id="prehashed"),
+    pytest.param(lambda: bcrypt.hashpw(b"Right-Password1", bcrypt.gensalt(rounds=4)).decode("utf-8"), id="legacy"),
+])
+def test_wrong_password_costs_one_bcrypt_run(stored_hash, checkpw_calls):
+    hashed = stored_hash()
+
+    assert not password_service.verify_password("Wrong-Password1", hashed)
+    assert len(checkpw_calls) == 1
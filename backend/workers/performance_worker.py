@@ -7,18 +7,31 @@ import logging
 from db.session import SessionLocal
 from models.performance import ServerPerformance
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import text
+from sqlalchemy import insert, text
 from middleware.enhanced_connection_tracker import connection_tracker
 
 logger = logging.getLogger(__name__)
 
+# Per-request metric rows are buffered in a queue and bulk-inserted by flush_request_metrics().
+# The queue is created per app in the lifespan (see create_metrics_queue), since an asyncio.Queue
+# binds to the first event loop that awaits it.
+METRICS_QUEUE_SIZE = 10_000
+METRICS_BATCH_SIZE = 500
+METRICS_FLUSH_INTERVAL = 1.0
+
+_dropped_metrics = 0  # Rows shed because the queue was full; reported and reset by the flusher
+
+
+def create_metrics_queue() -> asyncio.Queue:
+    """Bounded queue of request metric rows; call from the running loop (the app lifespan)"""
+    return asyncio.Queue(maxsize=METRICS_QUEUE_SIZE)
+
 
 def _get_system_metrics():
     """Collect system metrics with enhanced connection tracking"""
     metrics = {}
     try:
-        # Basic metrics
-        metrics["timestamp"] = datetime.now(timezone.utc)
+        # Basic metrics (timestamp comes from the column's UTC default)
         metrics["cpu_usage"] = psutil.cpu_percent(interval=1)
         metrics["memory_usage"] = psutil.virtual_memory().percent
         metrics["disk_usage"] = psutil.disk_usage('/').percent
@@ -30,11 +43,7 @@ def _get_system_metrics():
         metrics["anonymous_connections"] = connection_metrics["anonymous_connections"]
         metrics["unique_ips"] = connection_metrics["unique_ips"]
 
-        # Calculate average connection duration
-        durations = connection_metrics["connection_durations"].values()
-        metrics["avg_connection_duration"] = (
-            sum(durations) / len(durations) if durations else 0.0
-        )
+        metrics["avg_connection_duration"] = connection_metrics["avg_connection_duration"]
 
         # Store endpoint statistics
         metrics["endpoint_stats"] = {
@@ -53,50 +62,85 @@ def _get_system_metrics():
         return None
 
 
-async def record_request_metrics(request, response_time, status_code):
-    """Record metrics for individual requests with enhanced tracking"""
+def record_request_metrics(metrics_queue: asyncio.Queue, endpoint, response_time, status_code):
+    """Queue one request's metrics; never blocks (rows are dropped when the queue is full).
+    Only the per-request values are queued: system and connection stats are sampled once per
+    batch by flush_request_metrics()."""
+    global _dropped_metrics
     try:
-        # Get enhanced connection metrics for this specific endpoint
-        connection_metrics = connection_tracker.get_metrics()
-
-        metrics = {
-            "timestamp": datetime.now(timezone.utc),
-            "cpu_usage": psutil.cpu_percent(),
-            "memory_usage": psutil.virtual_memory().percent,
-            "disk_usage": psutil.disk_usage('/').percent,
-            "active_connections": connection_metrics["total_active_connections"],
-            "authenticated_connections": connection_metrics["authenticated_connections"],
-            "anonymous_connections": connection_metrics["anonymous_connections"],
-            "response_time": response_time,
-            "endpoint": str(request.url.path),
-            "http_status": status_code,
-            "unique_ips": connection_metrics["unique_ips"],
-            "avg_connection_duration": (
-                sum(connection_metrics["connection_durations"].values()) /
-                len(connection_metrics["connection_durations"])
-                if connection_metrics["connection_durations"] else 0.0
-            ),
-            "endpoint_stats": {
-                "per_endpoint": connection_metrics["per_endpoint_connections"],
-                "endpoints_per_ip": connection_metrics["endpoints_per_ip"]
-            }
+        # Timestamp taken now: the row is inserted up to METRICS_FLUSH_INTERVAL later
+        metrics_queue.put_nowait((endpoint, status_code, response_time, datetime.now(timezone.utc)))
+    except asyncio.QueueFull:
+        _dropped_metrics += 1  # Shed metrics rather than slow requests down when the writer falls behind
+
+
+def _insert_metrics(batch, connection_metrics):
+    """Stamp one system/connection sample onto a batch of queued requests and write them
+    with a single executemany INSERT"""
+    shared = {
+        "cpu_usage": psutil.cpu_percent(),
+        "memory_usage": psutil.virtual_memory().percent,
+        "disk_usage": psutil.disk_usage('/').percent,
+        "active_connections": connection_metrics["total_active_connections"],
+        "authenticated_connections": connection_metrics["authenticated_connections"],
+        "anonymous_connections": connection_metrics["anonymous_connections"],
+        "unique_ips": connection_metrics["unique_ips"],
+        "avg_connection_duration": connection_metrics["avg_connection_duration"],
+        "endpoint_stats": {
+            "per_endpoint": connection_metrics["per_endpoint_connections"],
+            "endpoints_per_ip": connection_metrics["endpoints_per_ip"]
         }
+    }
+    rows = [
+        {**shared, "endpoint": endpoint, "http_status": status_code,
+         "response_time": response_time, "timestamp": timestamp}
+        for endpoint, status_code, response_time, timestamp in batch
+    ]
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(ServerPerformance), rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def flush_request_metrics(metrics_queue: asyncio.Queue):
+    """Drain buffered request metrics, inserting up to METRICS_BATCH_SIZE rows per round trip"""
+    global _dropped_metrics
+    while True:
+        batch = [await metrics_queue.get()]
+
+        # Fill the batch until it is full or METRICS_FLUSH_INTERVAL has passed, whichever comes first
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + METRICS_FLUSH_INTERVAL
+        while len(batch) < METRICS_BATCH_SIZE:
+            if not metrics_queue.empty():
+                batch.append(metrics_queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(metrics_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        if _dropped_metrics:
+            logger.warning(f"Dropped {_dropped_metrics} request metrics (queue full)")
+            _dropped_metrics = 0
 
-        db = SessionLocal()
         try:
-            performance_record = ServerPerformance(**metrics)
-            db.add(performance_record)
-            db.commit()
-            logger.debug(f"Recorded request metrics for {request.url.path}")
+            # Tracker snapshot taken here on the loop (the tracker isn't thread-safe); psutil is
+            # sampled in the worker thread
+            connection_metrics = connection_tracker.get_metrics()
+            await asyncio.to_thread(_insert_metrics, batch, connection_metrics)
+            logger.debug(f"Recorded {len(batch)} request metrics")
         except Exception as e:
-            db.rollback()
             logger.error(f"Database error recording request metrics: {str(e)}")
-            raise
-        finally:
-            db.close()
-
-    except Exception as e:
-        logger.error(f"Critical error recording request metrics: {str(e)}", exc_info=True)
 
 
 class PerformanceMonitor:
@@ -162,7 +206,7 @@ class PerformanceMonitor:
             except asyncio.CancelledError:
                 logger.info("Performance monitoring task cancelled")
                 self.is_running = False
-                break
+                raise  # Let the supervising task group see the cancellation
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {str(e)}")
                 try: